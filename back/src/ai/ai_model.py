@@ -1,6 +1,9 @@
 import json
 import sys
 import logging
+import argparse
+import threading
+from functools import partial
 import pandas as pd
 import numpy as np
 import pickle
@@ -10,6 +13,7 @@ from sklearn.tree import DecisionTreeClassifier
 from statsmodels.tsa.arima.model import ARIMAResults
 import warnings
 import os
+from batch_scheduler import MicroBatchScheduler
 warnings.filterwarnings('ignore')
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -227,226 +231,490 @@ class EducationalPredictor:
     
     def predict_dropout_risk(self, cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones, es_urbana):
        
+        return self.predict_dropout_risk_batch([
+            (cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones, es_urbana)
+        ])[0]
+    
+    def dropout_feature_matrix(self, cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones, es_urbana):
+        # Acepta escalares o arreglos; devuelve una fila por escuela en el orden de entrenamiento
+        features = {
+            'cantidad_alumnos': np.asarray(cantidad_alumnos, dtype=float),
+            'numero_inscripciones': np.asarray(numero_inscripciones, dtype=float),
+            'numero_maestros': np.asarray(numero_maestros, dtype=float),
+            'promedio_calificaciones': np.asarray(promedio_calificaciones, dtype=float),
+            'esUrbana': np.asarray(es_urbana).astype(int),
+        }
+        features['student_teacher_ratio'] = features['cantidad_alumnos'] / features['numero_maestros']
+        features['enrollment_rate'] = features['numero_inscripciones'] / features['cantidad_alumnos']
+        
+       
+        if self.dt_metadata and 'features' in self.dt_metadata:
+            feature_order = self.dt_metadata['features']
+        else:
+       
+            feature_order = ['cantidad_alumnos', 'numero_inscripciones', 'numero_maestros',
+                             'promedio_calificaciones', 'esUrbana', 'student_teacher_ratio', 'enrollment_rate']
+        
+        columns = np.broadcast_arrays(*[features[feat] for feat in feature_order])
+        return np.column_stack([np.ravel(column) for column in columns]), features
+    
+    def predict_dropout_risk_batch(self, rows):
+        # rows: lista de (cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones, es_urbana)
         try:
             if not self.models_loaded or not self.decision_tree_model:
-                return {
+                return [{
                     "model_type": "Decision Tree",
                     "error": "Decision Tree model not loaded. Please run train_models.py first.",
                     "confidence": 0.0
-                }
-            
+                } for _ in rows]
             
-            features = {
-                'cantidad_alumnos': cantidad_alumnos,
-                'numero_inscripciones': numero_inscripciones,
-                'numero_maestros': numero_maestros,
-                'promedio_calificaciones': promedio_calificaciones,
-                'esUrbana': int(es_urbana),
-                'student_teacher_ratio': cantidad_alumnos / numero_maestros,
-                'enrollment_rate': numero_inscripciones / cantidad_alumnos
-            }
             
-           
-            if self.dt_metadata and 'features' in self.dt_metadata:
-                feature_order = self.dt_metadata['features']
-                feature_array = np.array([[features[feat] for feat in feature_order]])
-            else:
-       
-                feature_array = np.array([[
-                    features['cantidad_alumnos'],
-                    features['numero_inscripciones'], 
-                    features['numero_maestros'],
-                    features['promedio_calificaciones'],
-                    features['esUrbana'],
-                    features['student_teacher_ratio'],
-                    features['enrollment_rate']
-                ]])
+            columns = list(zip(*rows))
+            feature_array, features = self.dropout_feature_matrix(*columns)
             
         
-            prediction = self.decision_tree_model.predict(feature_array)[0]
-            prediction_proba = self.decision_tree_model.predict_proba(feature_array)[0]
-            
-           
-            risk_level = "ALTO" if prediction == 1 else "BAJO"
-            risk_color = "danger" if prediction == 1 else "success"
-            
-           
-            if max(prediction_proba) < 0.7: 
-                risk_level = "MEDIO"
-                risk_color = "warning"
+            predictions = self.decision_tree_model.predict(feature_array)
+            probabilities = self.decision_tree_model.predict_proba(feature_array)
+            
+            results = []
+            for i, (cantidad_alumnos, _, _, promedio_calificaciones, es_urbana) in enumerate(rows):
+                row_features = {name: values[i].item() for name, values in features.items()}
+                results.append(self._dropout_result(
+                    cantidad_alumnos, promedio_calificaciones, es_urbana,
+                    row_features, predictions[i], probabilities[i]
+                ))
+            return results
             
+        except Exception as e:
+            logger.error(f"Error in dropout prediction: {e}")
+            if len(rows) > 1:
+                # Reintenta fila por fila para que solo la fila inválida reciba el error
+                return [self.predict_dropout_risk_batch([row])[0] for row in rows]
+            return [{
+                "model_type": "Decision Tree",
+                "error": str(e),
+                "confidence": 0.0
+            } for _ in rows]
+    
+    def _dropout_result(self, cantidad_alumnos, promedio_calificaciones, es_urbana, features, prediction, prediction_proba):
         
-            if self.dt_metadata and 'median_dropout_threshold' in self.dt_metadata:
-                base_dropout_rate = self.dt_metadata['median_dropout_threshold']
-                if prediction == 1:
-                    estimated_dropout_rate = base_dropout_rate * (1.2 + prediction_proba[1] * 0.5)
-                else:
-                    estimated_dropout_rate = base_dropout_rate * (0.5 + prediction_proba[0] * 0.3)
+        risk_level = "ALTO" if prediction == 1 else "BAJO"
+        risk_color = "danger" if prediction == 1 else "success"
+        
+       
+        if max(prediction_proba) < 0.7: 
+            risk_level = "MEDIO"
+            risk_color = "warning"
+        
+    
+        if self.dt_metadata and 'median_dropout_threshold' in self.dt_metadata:
+            base_dropout_rate = self.dt_metadata['median_dropout_threshold']
+            if prediction == 1:
+                estimated_dropout_rate = base_dropout_rate * (1.2 + prediction_proba[1] * 0.5)
             else:
-                estimated_dropout_rate = 8.0 if prediction == 1 else 4.0
-            
-         
-            risk_factors = []
-            if features['student_teacher_ratio'] > 25:
-                risk_factors.append("Ratio estudiante-maestro muy alto (>25)")
-            elif features['student_teacher_ratio'] > 20:
-                risk_factors.append("Ratio estudiante-maestro alto (>20)")
-            
-            if features['promedio_calificaciones'] < 7.0:
-                risk_factors.append("Promedio de calificaciones muy bajo (<7.0)")
-            elif features['promedio_calificaciones'] < 8.0:
-                risk_factors.append("Promedio de calificaciones bajo (<8.0)")
-            
-            if features['enrollment_rate'] < 0.85:
-                risk_factors.append("Tasa de inscripción baja (<85%)")
-            
-            if not es_urbana:
-                risk_factors.append("Ubicación rural")
-            
-            if cantidad_alumnos < 150:
-                risk_factors.append("Escuela pequeña (<150 estudiantes)")
-            elif cantidad_alumnos > 500:
-                risk_factors.append("Escuela muy grande (>500 estudiantes)")
-            
-          
-            model_confidence = self.dt_metadata['accuracy'] if self.dt_metadata else 0.80
-            prediction_confidence = max(prediction_proba) * model_confidence
-            
+                estimated_dropout_rate = base_dropout_rate * (0.5 + prediction_proba[0] * 0.3)
+        else:
+            estimated_dropout_rate = 8.0 if prediction == 1 else 4.0
+        
+     
+        risk_factors = []
+        if features['student_teacher_ratio'] > 25:
+            risk_factors.append("Ratio estudiante-maestro muy alto (>25)")
+        elif features['student_teacher_ratio'] > 20:
+            risk_factors.append("Ratio estudiante-maestro alto (>20)")
+        
+        if features['promedio_calificaciones'] < 7.0:
+            risk_factors.append("Promedio de calificaciones muy bajo (<7.0)")
+        elif features['promedio_calificaciones'] < 8.0:
+            risk_factors.append("Promedio de calificaciones bajo (<8.0)")
+        
+        if features['enrollment_rate'] < 0.85:
+            risk_factors.append("Tasa de inscripción baja (<85%)")
+        
+        if not es_urbana:
+            risk_factors.append("Ubicación rural")
+        
+        if cantidad_alumnos < 150:
+            risk_factors.append("Escuela pequeña (<150 estudiantes)")
+        elif cantidad_alumnos > 500:
+            risk_factors.append("Escuela muy grande (>500 estudiantes)")
+        
+      
+        model_confidence = self.dt_metadata['accuracy'] if self.dt_metadata else 0.80
+        prediction_confidence = max(prediction_proba) * model_confidence
+        
+        return {
+            "model_type": "Decision Tree",
+            "risk_level": risk_level,
+            "risk_color": risk_color,
+            "risk_score": round(max(prediction_proba), 4),
+            "estimated_dropout_rate": round(estimated_dropout_rate, 2),
+            "confidence": round(prediction_confidence, 4),
+            "risk_factors": risk_factors,
+            "prediction_probabilities": {
+                "low_risk": round(prediction_proba[0], 4),
+                "high_risk": round(prediction_proba[1], 4)
+            },
+            "feature_analysis": {
+                "student_teacher_ratio": round(features['student_teacher_ratio'], 2),
+                "enrollment_rate": round(features['enrollment_rate'], 4),
+                "grade_category": "Alto" if promedio_calificaciones >= 8.5 else "Medio" if promedio_calificaciones >= 7.5 else "Bajo",
+                "school_size_category": "Pequeña" if cantidad_alumnos < 200 else "Grande" if cantidad_alumnos > 400 else "Mediana"
+            },
+            "model_info": {
+                "training_accuracy": self.dt_metadata['accuracy'] if self.dt_metadata else "N/A",
+                "training_date": self.dt_metadata['training_date'] if self.dt_metadata else "Unknown"
+            }
+        }
+
+    def sweep_dropout_scenarios(self, cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones, es_urbana, ranges):
+        # ranges: variable de SCENARIO_VARIABLES -> lista de valores; las demás quedan en el valor base
+        try:
+            if not self.models_loaded or not self.decision_tree_model:
+                return {
+                    "model_type": "Decision Tree",
+                    "error": "Decision Tree model not loaded. Please run train_models.py first.",
+                    "confidence": 0.0
+                }
+
+            base = {
+                'cantidad_alumnos': cantidad_alumnos,
+                'numero_inscripciones': numero_inscripciones,
+                'numero_maestros': numero_maestros,
+                'promedio_calificaciones': promedio_calificaciones
+            }
+            variables = [var for var in SCENARIO_VARIABLES if var in ranges]
+            axes = [np.asarray(ranges[var], dtype=float) for var in variables]
+            grids = np.meshgrid(*axes, indexing='ij')
+            shape = tuple(len(axis) for axis in axes)
+
+            columns = {var: np.full(int(np.prod(shape)), base[var], dtype=float) for var in SCENARIO_VARIABLES}
+            for var, grid in zip(variables, grids):
+                columns[var] = grid.ravel()
+
+
+            # La última fila es el escenario base
+            feature_array, _ = self.dropout_feature_matrix(
+                *[np.append(columns[var], base[var]) for var in SCENARIO_VARIABLES], es_urbana
+            )
+            probabilities = self.decision_tree_model.predict_proba(feature_array)
+            predictions = self.decision_tree_model.classes_[probabilities.argmax(axis=1)]
+            high_risk = probabilities[:, 1]
+
+            risk_levels = np.where(predictions == 1, "ALTO", "BAJO").astype('<U5')
+            risk_levels[probabilities.max(axis=1) < 0.7] = "MEDIO"
+
+            grid_levels, base_level = risk_levels[:-1], risk_levels[-1]
+            grid_high_risk = high_risk[:-1]
+
+
+            # Cambio relativo total respecto a la escuela base
+            distance = np.zeros(len(grid_levels))
+            for var, grid in zip(variables, grids):
+                distance += np.abs(grid.ravel() - base[var]) / max(abs(base[var]), 1.0)
+
+            candidates = np.flatnonzero(grid_levels != "ALTO")
+            smallest_change = None
+            if base_level != "ALTO":
+                # La escuela base ya está fuera de ALTO: no se requiere ningún cambio
+                smallest_change = {
+                    "values": {var: float(base[var]) for var in variables},
+                    "changes": {var: 0.0 for var in variables},
+                    "risk_level": str(base_level),
+                    "high_risk_probability": round(float(high_risk[-1]), 4)
+                }
+            elif len(candidates):
+                best = candidates[np.lexsort((grid_high_risk[candidates], distance[candidates]))[0]]
+                smallest_change = {
+                    "values": {var: float(grid.ravel()[best]) for var, grid in zip(variables, grids)},
+                    "changes": {var: round(float(grid.ravel()[best] - base[var]), 4) for var, grid in zip(variables, grids)},
+                    "risk_level": str(grid_levels[best]),
+                    "high_risk_probability": round(float(grid_high_risk[best]), 4)
+                }
+
+            levels, counts = np.unique(grid_levels, return_counts=True)
+
             return {
                 "model_type": "Decision Tree",
-                "risk_level": risk_level,
-                "risk_color": risk_color,
-                "risk_score": round(max(prediction_proba), 4),
-                "estimated_dropout_rate": round(estimated_dropout_rate, 2),
-                "confidence": round(prediction_confidence, 4),
-                "risk_factors": risk_factors,
-                "prediction_probabilities": {
-                    "low_risk": round(prediction_proba[0], 4),
-                    "high_risk": round(prediction_proba[1], 4)
+                "grid_points": int(len(grid_levels)),
+                "axes": {var: axis.tolist() for var, axis in zip(variables, axes)},
+                "risk_surface": {
+                    "high_risk_probability": np.round(grid_high_risk, 4).reshape(shape).tolist(),
+                    "risk_level": grid_levels.reshape(shape).tolist()
                 },
-                "feature_analysis": {
-                    "student_teacher_ratio": round(features['student_teacher_ratio'], 2),
-                    "enrollment_rate": round(features['enrollment_rate'], 4),
-                    "grade_category": "Alto" if promedio_calificaciones >= 8.5 else "Medio" if promedio_calificaciones >= 7.5 else "Bajo",
-                    "school_size_category": "Pequeña" if cantidad_alumnos < 200 else "Grande" if cantidad_alumnos > 400 else "Mediana"
+                "risk_level_counts": {str(level): int(count) for level, count in zip(levels, counts)},
+                "base_scenario": {
+                    "risk_level": str(base_level),
+                    "high_risk_probability": round(float(high_risk[-1]), 4)
                 },
+                "smallest_change": smallest_change,
                 "model_info": {
                     "training_accuracy": self.dt_metadata['accuracy'] if self.dt_metadata else "N/A",
                     "training_date": self.dt_metadata['training_date'] if self.dt_metadata else "Unknown"
                 }
             }
-            
+
         except Exception as e:
-            logger.error(f"Error in dropout prediction: {e}")
+            logger.error(f"Error in scenario sweep: {e}")
             return {
                 "model_type": "Decision Tree",
                 "error": str(e),
                 "confidence": 0.0
             }
 
-def process_parameters(parameters):
-    
+SCENARIO_VARIABLES = ['cantidad_alumnos', 'numero_inscripciones', 'numero_maestros', 'promedio_calificaciones']
+
+MAX_SCENARIO_POINTS = 200000
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+SUCCESS_MESSAGES = {
+    'enrollment': "Predicción de inscripciones generada exitosamente usando modelo ARIMA entrenado",
+    'dropout': "Predicción de riesgo de deserción generada exitosamente usando modelo de Árbol de Decisión entrenado",
+    'scenario': "Barrido de escenarios de riesgo de deserción generado exitosamente usando modelo de Árbol de Decisión entrenado"
+}
+
+def parse_parameters(model_type, parameters):
+    # Devuelve (input_parameters, None) o (None, respuesta de error)
     
-    try:
-        model_type = parameters.get('model_type', 'enrollment')
-        logger.info(f"Processing {model_type} model with parameters: {parameters}")
-        
-        predictor = EducationalPredictor()
+    if model_type == 'enrollment':
+
+        cantidad_alumnos = float(parameters.get('cantidad_alumnos', 0))
+        numero_inscripciones = float(parameters.get('numero_inscripciones', 0))
+        anio = int(parameters.get('anio', 2024))
         
-        if not predictor.models_loaded:
-            return {
+        if any(val <= 0 for val in [cantidad_alumnos, numero_inscripciones]):
+            return None, {
                 "status": "error",
-                "message": "Modelos no cargados. Execute train_models.py para entrenar los modelos primero.",
+                "message": "Cantidad de alumnos e inscripciones deben ser mayores a 0",
+                "model_type": "ARIMA",
                 "confidence": 0.0
             }
         
-        if model_type == 'enrollment':
+        return {
+            "cantidad_alumnos": cantidad_alumnos,
+            "numero_inscripciones": numero_inscripciones,
+            "anio": anio
+        }, None
+        
+    elif model_type == 'dropout':
 
-            cantidad_alumnos = float(parameters.get('cantidad_alumnos', 0))
-            numero_inscripciones = float(parameters.get('numero_inscripciones', 0))
-            anio = int(parameters.get('anio', 2024))
-            
-            if any(val <= 0 for val in [cantidad_alumnos, numero_inscripciones]):
-                return {
-                    "status": "error",
-                    "message": "Cantidad de alumnos e inscripciones deben ser mayores a 0",
-                    "model_type": "ARIMA",
-                    "confidence": 0.0
-                }
-            
-            result = predictor.predict_enrollment_arima(cantidad_alumnos, numero_inscripciones, anio)
-            
-            return {
-                "status": "success",
-                "message": "Predicción de inscripciones generada exitosamente usando modelo ARIMA entrenado",
-                "prediction_data": result,
-                "input_parameters": {
-                    "cantidad_alumnos": cantidad_alumnos,
-                    "numero_inscripciones": numero_inscripciones,
-                    "anio": anio
-                }
+        cantidad_alumnos = float(parameters.get('cantidad_alumnos', 0))
+        numero_inscripciones = float(parameters.get('numero_inscripciones', 0))
+        numero_maestros = float(parameters.get('numero_maestros', 1))
+        promedio_calificaciones = float(parameters.get('promedio_calificaciones', 0))
+        es_urbana = parameters.get('es_urbana', True)
+        
+  
+        if isinstance(es_urbana, str):
+            es_urbana = es_urbana.lower() in ['true', '1', 'yes', 'urbana']
+        
+        # El árbol trabaja en float32: infinitos, NaN o valores mayores fallarían en predict_proba
+        if not all(np.isfinite(val) and abs(val) <= FLOAT32_MAX
+                   for val in [cantidad_alumnos, numero_inscripciones, numero_maestros, promedio_calificaciones]):
+            return None, {
+                "status": "error",
+                "message": "Los valores deben ser números finitos",
+                "model_type": "Decision Tree",
+                "confidence": 0.0
+            }
+        
+        if any(val <= 0 for val in [cantidad_alumnos, numero_inscripciones, numero_maestros]):
+            return None, {
+                "status": "error",
+                "message": "Los valores de alumnos, inscripciones y maestros deben ser mayores a 0",
+                "model_type": "Decision Tree",
+                "confidence": 0.0
             }
             
-        elif model_type == 'dropout':
+        if promedio_calificaciones < 0 or promedio_calificaciones > 10:
+            return None, {
+                "status": "error",
+                "message": "El promedio de calificaciones debe estar entre 0 y 10",
+                "model_type": "Decision Tree",
+                "confidence": 0.0
+            }
+        
+        return {
+            "cantidad_alumnos": cantidad_alumnos,
+            "numero_inscripciones": numero_inscripciones,
+            "numero_maestros": numero_maestros,
+            "promedio_calificaciones": promedio_calificaciones,
+            "es_urbana": es_urbana
+        }, None
+    
+    elif model_type == 'scenario':
+        
+        inputs, error = parse_parameters('dropout', parameters)
+        if error:
+            return None, error
+        
+        ranges, error = parse_scenario_ranges(parameters.get('ranges', {}))
+        if error:
+            return None, error
+        
+        inputs['ranges'] = ranges
+        return inputs, None
+    
+    return None, {
+        "status": "error",
+        "message": f"Tipo de modelo no reconocido: {model_type}",
+        "confidence": 0.0
+    }
 
-            cantidad_alumnos = float(parameters.get('cantidad_alumnos', 0))
-            numero_inscripciones = float(parameters.get('numero_inscripciones', 0))
-            numero_maestros = float(parameters.get('numero_maestros', 1))
-            promedio_calificaciones = float(parameters.get('promedio_calificaciones', 0))
-            es_urbana = parameters.get('es_urbana', True)
-            
-      
-            if isinstance(es_urbana, str):
-                es_urbana = es_urbana.lower() in ['true', '1', 'yes', 'urbana']
-            
-            if any(val <= 0 for val in [cantidad_alumnos, numero_inscripciones, numero_maestros]):
-                return {
-                    "status": "error",
-                    "message": "Los valores de alumnos, inscripciones y maestros deben ser mayores a 0",
-                    "model_type": "Decision Tree",
-                    "confidence": 0.0
-                }
-                
-            if promedio_calificaciones < 0 or promedio_calificaciones > 10:
-                return {
-                    "status": "error",
-                    "message": "El promedio de calificaciones debe estar entre 0 y 10",
-                    "model_type": "Decision Tree",
-                    "confidence": 0.0
-                }
-            
-            result = predictor.predict_dropout_risk(
-                cantidad_alumnos, numero_inscripciones, numero_maestros, 
-                promedio_calificaciones, es_urbana
-            )
-            
-            return {
-                "status": "success",
-                "message": "Predicción de riesgo de deserción generada exitosamente usando modelo de Árbol de Decisión entrenado",
-                "prediction_data": result,
-                "input_parameters": {
-                    "cantidad_alumnos": cantidad_alumnos,
-                    "numero_inscripciones": numero_inscripciones,
-                    "numero_maestros": numero_maestros,
-                    "promedio_calificaciones": promedio_calificaciones,
-                    "es_urbana": es_urbana
-                }
+def parse_scenario_ranges(ranges):
+    # Cada variable acepta una lista de valores o {"min", "max", "step"} (inclusivo).
+    # El tamaño del barrido se valida antes de generar cualquier valor.
+    
+    def error(message):
+        return None, {
+            "status": "error",
+            "message": message,
+            "model_type": "Decision Tree",
+            "confidence": 0.0
+        }
+    
+    if isinstance(ranges, str):
+        try:
+            ranges = json.loads(ranges)
+        except json.JSONDecodeError as e:
+            return error(f"Rangos JSON inválidos: {str(e)}")
+    if not isinstance(ranges, dict):
+        return error("'ranges' debe ser un objeto con una entrada por variable")
+    
+    counts = {}
+    grid_points = 1
+    for variable, spec in ranges.items():
+        if variable not in SCENARIO_VARIABLES:
+            return error(f"Variable de escenario no reconocida: {variable}")
+        
+        if isinstance(spec, dict):
+            if 'min' not in spec or 'max' not in spec:
+                return error(f"El rango de {variable} requiere 'min' y 'max'")
+            try:
+                start, stop, step = float(spec['min']), float(spec['max']), float(spec.get('step', 1))
+            except (TypeError, ValueError):
+                return error(f"El rango de {variable} debe contener valores numéricos")
+            if not all(np.isfinite([start, stop, step])) or step <= 0 or stop < start:
+                return error(f"Rango inválido para {variable}: se requiere min <= max y step > 0")
+            # Se calcula en float: (max - min) / step puede desbordar a infinito
+            count = np.floor((stop - start) / step + 1e-9) + 1
+            if not np.isfinite(count) or count > MAX_SCENARIO_POINTS:
+                return error(f"El barrido excede el máximo de {MAX_SCENARIO_POINTS} escenarios")
+            counts[variable] = int(count)
+        elif isinstance(spec, list):
+            counts[variable] = len(spec)
+        else:
+            return error(f"El rango de {variable} debe ser una lista o un objeto {{min, max, step}}")
+        
+        if counts[variable] == 0:
+            return error(f"El rango de {variable} no contiene valores")
+        grid_points *= counts[variable]
+        if grid_points > MAX_SCENARIO_POINTS:
+            return error(f"El barrido excede el máximo de {MAX_SCENARIO_POINTS} escenarios")
+    
+    parsed = {}
+    for variable, spec in ranges.items():
+        if isinstance(spec, dict):
+            values = (float(spec['min']) + float(spec.get('step', 1)) * np.arange(counts[variable])).round(6).tolist()
+        else:
+            try:
+                values = sorted({float(value) for value in spec})
+            except (TypeError, ValueError):
+                return error(f"El rango de {variable} debe contener valores numéricos")
+            if not all(np.isfinite(values)):
+                return error(f"El rango de {variable} debe contener valores numéricos")
+        
+        if variable == 'promedio_calificaciones':
+            if values[0] < 0 or values[-1] > 10:
+                return error("El promedio de calificaciones debe estar entre 0 y 10")
+        elif values[0] <= 0:
+            return error("Los valores de alumnos, inscripciones y maestros deben ser mayores a 0")
+        
+        parsed[variable] = values
+    
+    return parsed, None
+
+def process_batch(predictor, model_type, parameters_list):
+    # Valida cada solicitud y ejecuta una sola inferencia para todas las válidas del mismo model_type
+    
+    responses = [None] * len(parameters_list)
+    valid = []
+    for i, parameters in enumerate(parameters_list):
+        try:
+            inputs, error = parse_parameters(model_type, parameters)
+        except ValueError as e:
+            logger.error(f"Value error processing parameters: {e}")
+            inputs, error = None, {
+                "status": "error",
+                "message": f"Parámetros inválidos: {str(e)}",
+                "confidence": 0.0
+            }
+        except Exception as e:
+            # Un error en una solicitud no debe afectar a las demás del lote
+            logger.error(f"Unexpected error processing parameters: {e}")
+            inputs, error = None, {
+                "status": "error",
+                "message": f"Error inesperado: {str(e)}",
+                "confidence": 0.0
             }
         
+        if error:
+            responses[i] = error
         else:
+            valid.append((i, inputs))
+    
+    if not valid:
+        return responses
+    
+    if model_type == 'enrollment':
+        results = [
+            predictor.predict_enrollment_arima(inputs['cantidad_alumnos'], inputs['numero_inscripciones'], inputs['anio'])
+            for _, inputs in valid
+        ]
+    elif model_type == 'scenario':
+        results = [
+            predictor.sweep_dropout_scenarios(
+                inputs['cantidad_alumnos'], inputs['numero_inscripciones'], inputs['numero_maestros'],
+                inputs['promedio_calificaciones'], inputs['es_urbana'], inputs['ranges']
+            )
+            for _, inputs in valid
+        ]
+    else:
+        results = predictor.predict_dropout_risk_batch([
+            (inputs['cantidad_alumnos'], inputs['numero_inscripciones'], inputs['numero_maestros'],
+             inputs['promedio_calificaciones'], inputs['es_urbana'])
+            for _, inputs in valid
+        ])
+    
+    for (i, inputs), result in zip(valid, results):
+        responses[i] = {
+            "status": "success",
+            "message": SUCCESS_MESSAGES[model_type],
+            "prediction_data": result,
+            "input_parameters": inputs
+        }
+    
+    return responses
+
+def process_parameters(parameters, predictor=None):
+    
+    
+    try:
+        model_type = parameters.get('model_type', 'enrollment')
+        logger.info(f"Processing {model_type} model with parameters: {parameters}")
+        
+        predictor = predictor or EducationalPredictor()
+        
+        if not predictor.models_loaded:
             return {
                 "status": "error",
-                "message": f"Tipo de modelo no reconocido: {model_type}",
+                "message": "Modelos no cargados. Execute train_models.py para entrenar los modelos primero.",
                 "confidence": 0.0
             }
+        
+        return process_batch(predictor, model_type, [parameters])[0]
             
-    except ValueError as e:
-        logger.error(f"Value error processing parameters: {e}")
-        return {
-            "status": "error",
-            "message": f"Parámetros inválidos: {str(e)}",
-            "confidence": 0.0
-        }
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return {
@@ -455,8 +723,95 @@ def process_parameters(parameters):
             "confidence": 0.0
         }
 
+def serve(max_wait_ms=2.0, max_batch_size=64):
+    # Modo de larga duración: una solicitud JSON por línea en stdin ({"id": ..., "parameters": {...}}
+    # o {"id": ..., "command": "metrics"}) y una respuesta JSON por línea en stdout.
+    
+    predictor = EducationalPredictor()
+    scheduler = MicroBatchScheduler(
+        {model_type: partial(process_batch, predictor, model_type) for model_type in SUCCESS_MESSAGES},
+        max_wait_ms=max_wait_ms,
+        max_batch_size=max_batch_size
+    ).start()
+    output_lock = threading.Lock()
+    
+    def write(response):
+        response["timestamp"] = datetime.now().isoformat()
+        with output_lock:
+            print(json.dumps(response, ensure_ascii=False), flush=True)
+    
+    def write_result(request_id, future):
+        try:
+            response = future.result()
+        except Exception as e:
+            response = {
+                "status": "error",
+                "message": f"Error inesperado: {str(e)}",
+                "confidence": 0.0
+            }
+        write({"id": request_id, **response})
+    
+    logger.info(f"Modo servicio iniciado (ventana {max_wait_ms} ms, lote máximo {max_batch_size})")
+    
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                write({"id": None, "status": "error", "message": f"Parámetros JSON inválidos: {str(e)}"})
+                continue
+            
+            if not isinstance(request, dict):
+                write({"id": None, "status": "error", "message": "La solicitud debe ser un objeto JSON"})
+                continue
+            
+            request_id = request.get('id')
+            if request.get('command') == 'metrics':
+                write({"id": request_id, "status": "success", "metrics": scheduler.metrics()})
+                continue
+            
+            parameters = request.get('parameters', request)
+            if not isinstance(parameters, dict):
+                write({"id": request_id, "status": "error", "message": "'parameters' debe ser un objeto JSON"})
+                continue
+            model_type = parameters.get('model_type', 'enrollment')
+            
+            if not predictor.models_loaded:
+                write({
+                    "id": request_id,
+                    "status": "error",
+                    "message": "Modelos no cargados. Execute train_models.py para entrenar los modelos primero.",
+                    "confidence": 0.0
+                })
+                continue
+            
+            if model_type not in SUCCESS_MESSAGES:
+                write({
+                    "id": request_id,
+                    "status": "error",
+                    "message": f"Tipo de modelo no reconocido: {model_type}",
+                    "confidence": 0.0
+                })
+                continue
+            
+            future = scheduler.submit(model_type, parameters)
+            future.add_done_callback(partial(write_result, request_id))
+    finally:
+        scheduler.stop()
+
 def main():
     """Main execution function"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        parser = argparse.ArgumentParser(prog='ai_model.py --serve')
+        parser.add_argument('--window-ms', type=float, default=2.0)
+        parser.add_argument('--max-batch-size', type=int, default=64)
+        args = parser.parse_args(sys.argv[2:])
+        serve(args.window_ms, args.max_batch_size)
+        return
+    
     try:
         if len(sys.argv) != 2:
             raise ValueError("Los parámetros deben ser ingresados como un único argumento JSON.")
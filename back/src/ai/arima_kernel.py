@@ -0,0 +1,97 @@
+# arima_kernel.py - Pronósticos vectorizados para muchas series ARIMA a la vez
+import numpy as np
+from scipy.stats import norm
+
+STACKED_KEYS = ['design', 'obs_intercept', 'obs_cov', 'transition',
+                'state_intercept', 'selected_state_cov', 'state', 'state_cov']
+
+
+def _time_invariant(matrix, name):
+    # Una constante (trend='c') aparece repetida en cada periodo; se acepta si no cambia
+    if not np.allclose(matrix, matrix[..., :1]):
+        raise ValueError(f"La matriz '{name}' varía en el tiempo; el kernel solo soporta modelos invariantes")
+    return matrix[..., 0]
+
+
+def stack_arima_results(results):
+    """Apila las matrices de espacio de estados de varios ARIMAResults univariados.
+
+    Cada serie puede tener distinto orden (p, d, q); los estados se rellenan con
+    ceros hasta el tamaño máximo, lo que no altera el pronóstico. `state` y
+    `state_cov` son el estado predicho para el primer periodo fuera de muestra.
+    """
+    filters = [r.filter_results for r in results]
+    k_states = max(f.k_states for f in filters)
+    n = len(filters)
+
+    stacked = {
+        'design': np.zeros((n, k_states)),
+        'obs_intercept': np.zeros(n),
+        'obs_cov': np.zeros(n),
+        'transition': np.zeros((n, k_states, k_states)),
+        'state_intercept': np.zeros((n, k_states)),
+        'selected_state_cov': np.zeros((n, k_states, k_states)),
+        'state': np.zeros((n, k_states)),
+        'state_cov': np.zeros((n, k_states, k_states)),
+    }
+
+    for i, f in enumerate(filters):
+        if f.k_endog != 1:
+            raise ValueError("Solo se soportan series univariadas")
+        k = f.k_states
+        selection = _time_invariant(f.selection, 'selection')
+        state_cov = _time_invariant(f.state_cov, 'state_cov')
+
+        stacked['design'][i, :k] = _time_invariant(f.design, 'design')[0]
+        stacked['obs_intercept'][i] = _time_invariant(f.obs_intercept, 'obs_intercept')[0]
+        stacked['obs_cov'][i] = _time_invariant(f.obs_cov, 'obs_cov')[0, 0]
+        stacked['transition'][i, :k, :k] = _time_invariant(f.transition, 'transition')
+        stacked['state_intercept'][i, :k] = _time_invariant(f.state_intercept, 'state_intercept')
+        stacked['selected_state_cov'][i, :k, :k] = selection @ state_cov @ selection.T
+        stacked['state'][i, :k] = f.predicted_state[:, -1]
+        stacked['state_cov'][i, :k, :k] = f.predicted_state_cov[:, :, -1]
+
+    return stacked
+
+
+def save_stacked(stacked, path):
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **stacked)
+
+
+def load_stacked(path):
+    with np.load(path) as arrays:
+        return {key: arrays[key] for key in STACKED_KEYS}
+
+
+def forecast_batch(stacked, steps):
+    """Pronóstico puntual y varianza de `steps` periodos para todas las series.
+
+    Devuelve (mean, var), ambos con forma (n_series, steps).
+    """
+    Z = stacked['design']
+    T = stacked['transition']
+    c = stacked['state_intercept']
+    RQR = stacked['selected_state_cov']
+    a = stacked['state'].copy()
+    P = stacked['state_cov'].copy()
+
+    n = Z.shape[0]
+    mean = np.empty((n, steps))
+    var = np.empty((n, steps))
+
+    for h in range(steps):
+        if h > 0:
+            a = np.einsum('nij,nj->ni', T, a) + c
+            P = np.einsum('nij,njk,nlk->nil', T, P, T) + RQR
+        mean[:, h] = np.einsum('ni,ni->n', Z, a) + stacked['obs_intercept']
+        var[:, h] = np.einsum('ni,nij,nj->n', Z, P, Z) + stacked['obs_cov']
+
+    return mean, var
+
+
+def forecast_intervals(mean, var, alpha=0.05):
+    # Mismo intervalo normal que PredictionResults.conf_int
+    q = norm.ppf(1 - alpha / 2)
+    std = np.sqrt(var)
+    return mean - q * std, mean + q * std
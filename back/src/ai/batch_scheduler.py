@@ -0,0 +1,136 @@
+# batch_scheduler.py - Agrupa solicitudes concurrentes en micro-lotes por model_type
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchScheduler:
+    """Acumula solicitudes durante `max_wait_ms` (o hasta `max_batch_size`)
+    y ejecuta un solo handler por model_type con todas las del lote.
+
+    `handlers` mapea model_type -> función(lista de parámetros) -> lista de resultados
+    en el mismo orden.
+    """
+
+    def __init__(self, handlers, max_wait_ms=2.0, max_batch_size=64, delay_samples=1000):
+        self.handlers = handlers
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._stop = threading.Event()
+
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._queue_delays = deque(maxlen=delay_samples)
+        self._requests = 0
+        self._batches = 0
+
+    def start(self):
+        if self._worker is None:
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='micro-batch-scheduler', daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        if self._worker is not None:
+            self._stop.set()
+            self._worker.join()
+            self._worker = None
+
+    def submit(self, model_type, parameters):
+        future = Future()
+        self._queue.put((model_type, parameters, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = first[3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Vencida la ventana, solo se toma lo que ya está en cola
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        groups = {}
+        for model_type, parameters, future, submitted_at in batch:
+            groups.setdefault(model_type, []).append((parameters, future, submitted_at))
+
+        for model_type, items in groups.items():
+            # Los grupos se ejecutan en serie: la espera incluye los handlers de grupos anteriores
+            started_at = time.perf_counter()
+            with self._metrics_lock:
+                self._requests += len(items)
+                self._batches += 1
+                self._batch_sizes[len(items)] += 1
+                self._queue_delays.extend((started_at - item[2]) * 1000.0 for item in items)
+
+            handler = self.handlers.get(model_type)
+            if handler is None:
+                for _, future, _ in items:
+                    future.set_exception(ValueError(f"Tipo de modelo no reconocido: {model_type}"))
+                continue
+
+            try:
+                results = handler([parameters for parameters, _, _ in items])
+            except Exception as e:
+                logger.error(f"Error processing {model_type} batch of {len(items)}: {e}")
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(items, results):
+                future.set_result(result)
+
+    def metrics(self):
+        with self._metrics_lock:
+            delays = sorted(self._queue_delays)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            requests, batches = self._requests, self._batches
+
+        def percentile(p):
+            if not delays:
+                return 0.0
+            return round(delays[min(len(delays) - 1, int(p / 100.0 * len(delays)))], 4)
+
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": round(requests / batches, 4) if batches else 0.0,
+            "batch_size_distribution": batch_sizes,
+            "queue_delay_ms": {
+                "mean": round(sum(delays) / len(delays), 4) if delays else 0.0,
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "p99": percentile(99),
+                "max": round(delays[-1], 4) if delays else 0.0
+            },
+            "config": {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_batch_size": self.max_batch_size
+            }
+        }
@@ -0,0 +1,172 @@
+# rollup_store.py - Agregados incrementales por periodo, escuela y municipio
+import numpy as np
+import pandas as pd
+
+METRICS = ['cantidad_alumnos', 'numero_inscripciones', 'tasa_desercion',
+           'tasa_promocion', 'numero_maestros', 'promedio_calificaciones']
+
+LEVELS = ('periodo', 'escuela', 'municipio')
+
+
+def time_period(anio, semestre):
+    return anio + (semestre - 1) * 0.5
+
+
+class RollupStore:
+    """Sumas y conteos acumulados de METRICS.
+
+    Cada registro (escuelaId, anio, semestre) actualiza en O(1) tres agregados:
+    por periodo, por (escuela, periodo) y por (municipio, periodo). Volver a
+    insertar un registro existente se trata como una corrección: se resta su
+    contribución anterior antes de sumar la nueva.
+    """
+
+    def __init__(self, escuela_municipios=None):
+        self.escuela_municipios = dict(escuela_municipios or {})
+        # (escuelaId, time_period) -> (municipioId o None, valores)
+        self.records = {}
+        # 'periodo' -> time_period -> [conteo, suma_metrica_0, ..., suma_metrica_n]
+        # 'escuela'/'municipio' -> id -> time_period -> [conteo, ...]
+        self.rollups = {level: {} for level in LEVELS}
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_dataframe(cls, data, escuela_municipios=None):
+        store = cls(escuela_municipios)
+        for record in data.to_dict('records'):
+            store.add_record(record)
+        return store
+
+    def _apply(self, escuela_id, period, municipio_id, values, sign):
+        entities = [('escuela', escuela_id)]
+        if municipio_id is not None:
+            entities.append(('municipio', municipio_id))
+        tables = [self.rollups['periodo']] + [
+            self.rollups[level].setdefault(entity_id, {}) for level, entity_id in entities]
+
+        for table in tables:
+            stats = table.get(period)
+            if stats is None:
+                stats = table[period] = [0] + [0.0] * len(METRICS)
+            stats[0] += sign
+            for i, value in enumerate(values, start=1):
+                stats[i] += sign * value
+            if stats[0] == 0:
+                del table[period]
+
+        for level, entity_id in entities:
+            if not self.rollups[level][entity_id]:
+                del self.rollups[level][entity_id]
+
+    def add_record(self, record):
+        """Inserta o corrige un registro; devuelve False si ya estaba con los mismos valores."""
+        escuela_id = int(record['escuelaId'])
+        period = time_period(int(record['anio']), int(record['semestre']))
+        municipio_id = record.get('municipioId', self.escuela_municipios.get(escuela_id))
+        if municipio_id is not None:
+            municipio_id = int(municipio_id)
+        values = tuple(float(record[metric]) for metric in METRICS)
+
+        previous = self.records.get((escuela_id, period))
+        if previous == (municipio_id, values):
+            return False
+        if previous is not None:
+            self._apply(escuela_id, period, previous[0], previous[1], -1)
+
+        self.records[(escuela_id, period)] = (municipio_id, values)
+        self._apply(escuela_id, period, municipio_id, values, 1)
+        return True
+
+    def sync_dataframe(self, data):
+        """Aplica solo los registros nuevos o corregidos de `data` y elimina los
+        que ya no aparecen. Devuelve (actualizados, eliminados)."""
+        updated = 0
+        seen = set()
+        for record in data.to_dict('records'):
+            updated += self.add_record(record)
+            seen.add((int(record['escuelaId']), time_period(int(record['anio']), int(record['semestre']))))
+
+        stale = [key for key in self.records if key not in seen]
+        for escuela_id, period in stale:
+            municipio_id, values = self.records.pop((escuela_id, period))
+            self._apply(escuela_id, period, municipio_id, values, -1)
+        return updated, len(stale)
+
+    def remove_record(self, escuela_id, anio, semestre):
+        period = time_period(int(anio), int(semestre))
+        previous = self.records.pop((int(escuela_id), period), None)
+        if previous is None:
+            raise KeyError(f"Registro no encontrado: escuela {escuela_id}, {anio}-{semestre}")
+        self._apply(int(escuela_id), period, previous[0], previous[1], -1)
+
+    def mean_series(self, metric, level='periodo', key=None):
+        """Promedio de `metric` por time_period, ordenado por periodo.
+
+        Para level='escuela' o 'municipio', `key` es el id a filtrar.
+        """
+        column = METRICS.index(metric) + 1
+        if level == 'periodo':
+            table = self.rollups[level]
+        else:
+            table = self.rollups[level].get(key, {})
+
+        series = pd.Series({period: stats[column] / stats[0] for period, stats in table.items()},
+                           name=metric, dtype=float)
+        series.index.name = 'time_period'
+        return series.sort_index()
+
+    def save(self, path):
+        record_keys = np.array(list(self.records.keys()), dtype=float).reshape(-1, 2)
+        record_municipios = np.array(
+            [-1 if m is None else m for m, _ in self.records.values()], dtype=np.int64)
+        record_values = np.array(
+            [values for _, values in self.records.values()], dtype=float).reshape(-1, len(METRICS))
+
+        arrays = {
+            'metrics': np.array(METRICS),
+            'record_keys': record_keys,
+            'record_municipios': record_municipios,
+            'record_values': record_values,
+            'escuela_municipios': np.array(list(self.escuela_municipios.items()),
+                                           dtype=np.int64).reshape(-1, 2),
+        }
+        for level, table in self.rollups.items():
+            if level == 'periodo':
+                keys, stats = list(table.keys()), list(table.values())
+                key_width = 1
+            else:
+                entries = [((entity_id, period), row) for entity_id, periods in table.items()
+                           for period, row in periods.items()]
+                keys, stats = [k for k, _ in entries], [row for _, row in entries]
+                key_width = 2
+            arrays[f'{level}_keys'] = np.array(keys, dtype=float).reshape(-1, key_width)
+            arrays[f'{level}_stats'] = np.array(stats, dtype=float).reshape(-1, len(METRICS) + 1)
+
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            if arrays['metrics'].tolist() != METRICS:
+                raise ValueError("El archivo de agregados fue generado con otras métricas")
+
+            store = cls({int(e): int(m) for e, m in arrays['escuela_municipios']})
+            for (escuela_id, period), municipio_id, values in zip(
+                    arrays['record_keys'], arrays['record_municipios'], arrays['record_values']):
+                store.records[(int(escuela_id), float(period))] = (
+                    None if municipio_id < 0 else int(municipio_id), tuple(values.tolist()))
+
+            for level in LEVELS:
+                keys = arrays[f'{level}_keys']
+                stats = arrays[f'{level}_stats']
+                table = store.rollups[level]
+                for key, row in zip(keys, stats):
+                    entry = [int(row[0])] + row[1:].tolist()
+                    if level == 'periodo':
+                        table[float(key[0])] = entry
+                    else:
+                        table.setdefault(int(key[0]), {})[float(key[1])] = entry
+        return store
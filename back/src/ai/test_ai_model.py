@@ -0,0 +1,218 @@
+import os
+import time
+
+import pytest
+
+from ai_model import (EducationalPredictor, MAX_SCENARIO_POINTS, SUCCESS_MESSAGES, parse_scenario_ranges,
+                      process_batch, process_parameters)
+from batch_scheduler import MicroBatchScheduler
+
+# load_models busca './src/ai/models', relativo al directorio back/
+BACK_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+DROPOUT_REQUESTS = [
+    {"model_type": "dropout", "cantidad_alumnos": 300, "numero_inscripciones": 250,
+     "numero_maestros": 10, "promedio_calificaciones": 6.5, "es_urbana": "false"},
+    {"model_type": "dropout", "cantidad_alumnos": 300, "numero_inscripciones": 290,
+     "numero_maestros": 20, "promedio_calificaciones": 8.6, "es_urbana": True},
+    {"model_type": "dropout", "cantidad_alumnos": 120, "numero_inscripciones": 90,
+     "numero_maestros": 4, "promedio_calificaciones": 7.2, "es_urbana": False},
+    {"model_type": "dropout", "cantidad_alumnos": 550, "numero_inscripciones": 540,
+     "numero_maestros": 30, "promedio_calificaciones": 9.1, "es_urbana": "urbana"},
+]
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    cwd = os.getcwd()
+    os.chdir(BACK_DIR)
+    try:
+        predictor = EducationalPredictor()
+    finally:
+        os.chdir(cwd)
+    assert predictor.models_loaded
+    return predictor
+
+
+def test_single_request_output_is_unchanged(predictor):
+    # Valores generados por la versión de un solo registro de predict_dropout_risk
+    result = process_parameters(DROPOUT_REQUESTS[0], predictor)
+
+    assert result["status"] == "success"
+    data = result["prediction_data"]
+    assert data["risk_level"] == "ALTO"
+    assert data["risk_score"] == 0.7436
+    assert data["estimated_dropout_rate"] == 10.81
+    assert data["feature_analysis"] == {
+        "student_teacher_ratio": 30.0,
+        "enrollment_rate": 0.8333,
+        "grade_category": "Bajo",
+        "school_size_category": "Mediana"
+    }
+    assert result["input_parameters"]["es_urbana"] is False
+
+
+def test_batch_matches_single_requests(predictor):
+    batched = process_batch(predictor, 'dropout', DROPOUT_REQUESTS)
+    single = [process_parameters(parameters, predictor) for parameters in DROPOUT_REQUESTS]
+
+    assert batched == single
+    assert all(response["message"] == SUCCESS_MESSAGES['dropout'] for response in batched)
+
+
+def test_invalid_request_does_not_poison_batch(predictor):
+    requests = [
+        DROPOUT_REQUESTS[0],
+        {"model_type": "dropout", "cantidad_alumnos": None},
+        DROPOUT_REQUESTS[1],
+        {"model_type": "dropout", "cantidad_alumnos": "abc"},
+        {"model_type": "dropout", "cantidad_alumnos": 0, "numero_inscripciones": 1},
+    ]
+    responses = process_batch(predictor, 'dropout', requests)
+
+    assert responses[0] == process_parameters(DROPOUT_REQUESTS[0], predictor)
+    assert responses[2] == process_parameters(DROPOUT_REQUESTS[1], predictor)
+    assert responses[1]["status"] == "error"
+    assert responses[1]["message"].startswith("Error inesperado")
+    assert responses[3]["message"].startswith("Parámetros inválidos")
+    assert responses[4]["message"] == "Los valores de alumnos, inscripciones y maestros deben ser mayores a 0"
+
+
+def test_non_finite_request_does_not_poison_batch(predictor):
+    requests = [
+        DROPOUT_REQUESTS[0],
+        {**DROPOUT_REQUESTS[1], "cantidad_alumnos": float('inf')},
+        {**DROPOUT_REQUESTS[2], "numero_maestros": 1e39},
+        {**DROPOUT_REQUESTS[3], "promedio_calificaciones": float('nan')},
+    ]
+    responses = process_batch(predictor, 'dropout', requests)
+
+    assert responses[0] == process_parameters(DROPOUT_REQUESTS[0], predictor)
+    for response in responses[1:]:
+        assert response["status"] == "error"
+        assert response["message"] == "Los valores deben ser números finitos"
+
+
+def test_failed_batch_prediction_falls_back_to_single_rows(predictor):
+    # Cociente alumnos/maestros fuera de float32 aunque cada valor sea válido
+    rows = [(300, 250, 10, 6.5, False), (3e38, 250, 1e-10, 6.5, False), (300, 290, 20, 8.6, True)]
+    results = predictor.predict_dropout_risk_batch(rows)
+
+    assert results[0] == predictor.predict_dropout_risk(*rows[0])
+    assert results[2] == predictor.predict_dropout_risk(*rows[2])
+    assert "error" in results[1]
+
+
+def test_scheduler_isolates_invalid_request(predictor):
+    scheduler = MicroBatchScheduler({'dropout': lambda batch: process_batch(predictor, 'dropout', batch)},
+                                    max_wait_ms=50, max_batch_size=10)
+    futures = [scheduler.submit('dropout', parameters) for parameters in
+               [DROPOUT_REQUESTS[0], {"model_type": "dropout", "cantidad_alumnos": None}, DROPOUT_REQUESTS[2]]]
+    scheduler.start()
+    try:
+        responses = [future.result(timeout=5) for future in futures]
+    finally:
+        scheduler.stop()
+
+    assert [response["status"] for response in responses] == ["success", "error", "success"]
+    assert scheduler.metrics()['batch_size_distribution'] == {3: 1}
+
+
+SCENARIO_BASE = {"model_type": "scenario", "cantidad_alumnos": 300, "numero_inscripciones": 250,
+                 "numero_maestros": 10, "promedio_calificaciones": 6.5, "es_urbana": False}
+SCENARIO_RANGES = {
+    "cantidad_alumnos": {"min": 200, "max": 500, "step": 5},
+    "numero_maestros": {"min": 5, "max": 40, "step": 1},
+    "promedio_calificaciones": {"min": 5, "max": 10, "step": 0.25},
+}
+
+
+def test_scenario_sweep_matches_single_predictions(predictor):
+    response = process_parameters({**SCENARIO_BASE, "ranges": SCENARIO_RANGES}, predictor)
+    assert response["status"] == "success"
+    data = response["prediction_data"]
+
+    axes = data["axes"]
+    assert list(axes) == ["cantidad_alumnos", "numero_maestros", "promedio_calificaciones"]
+    assert [len(axis) for axis in axes.values()] == [61, 36, 21]
+    assert axes["promedio_calificaciones"][:3] == [5.0, 5.25, 5.5]
+    assert data["grid_points"] == 61 * 36 * 21
+    assert sum(data["risk_level_counts"].values()) == data["grid_points"]
+
+    surface = data["risk_surface"]
+    for i, j, k in [(0, 0, 0), (20, 5, 6), (60, 35, 20), (12, 30, 3), (45, 2, 17)]:
+        single = predictor.predict_dropout_risk(
+            axes["cantidad_alumnos"][i], 250, axes["numero_maestros"][j],
+            axes["promedio_calificaciones"][k], False)
+        assert surface["risk_level"][i][j][k] == single["risk_level"]
+        assert surface["high_risk_probability"][i][j][k] == single["prediction_probabilities"]["high_risk"]
+
+    assert data["base_scenario"]["risk_level"] == "ALTO"
+    change = data["smallest_change"]
+    assert change["risk_level"] != "ALTO"
+    single = predictor.predict_dropout_risk(
+        change["values"]["cantidad_alumnos"], 250, change["values"]["numero_maestros"],
+        change["values"]["promedio_calificaciones"], False)
+    assert single["risk_level"] == change["risk_level"]
+
+
+def test_scenario_base_already_out_of_alto(predictor):
+    base = {**SCENARIO_BASE, "cantidad_alumnos": 236, "numero_inscripciones": 510, "promedio_calificaciones": 7.7}
+    response = process_parameters({**base, "ranges": {"cantidad_alumnos": [200, 234, 250]}}, predictor)
+    data = response["prediction_data"]
+
+    assert data["base_scenario"]["risk_level"] == "MEDIO"
+    assert data["smallest_change"]["changes"] == {"cantidad_alumnos": 0.0}
+    assert data["smallest_change"]["values"] == {"cantidad_alumnos": 236.0}
+    assert data["smallest_change"]["risk_level"] == "MEDIO"
+
+
+def test_scenario_without_ranges_scores_base_only(predictor):
+    data = process_parameters({**SCENARIO_BASE, "ranges": {}}, predictor)["prediction_data"]
+
+    assert data["grid_points"] == 1
+    assert data["axes"] == {}
+    assert data["smallest_change"] is None
+
+
+def test_scenario_cap_rejects_before_expanding():
+    for ranges in [{"numero_maestros": {"min": 1, "max": 3e7, "step": 1}},
+                   {"numero_maestros": {"min": 1, "max": 3, "step": 1e-9}},
+                   {"numero_maestros": {"min": 1, "max": 1e308, "step": 1e-308}},
+                   {"numero_maestros": {"min": 1, "max": 1000}, "cantidad_alumnos": {"min": 1, "max": 1000}}]:
+        start = time.perf_counter()
+        ranges, error = parse_scenario_ranges(ranges)
+        assert time.perf_counter() - start < 0.1
+        assert ranges is None
+        assert error["message"] == f"El barrido excede el máximo de {MAX_SCENARIO_POINTS} escenarios"
+
+
+@pytest.mark.parametrize("ranges, message", [
+    ([1, 2], "'ranges' debe ser un objeto con una entrada por variable"),
+    ({"foo": [1]}, "Variable de escenario no reconocida: foo"),
+    ({"numero_maestros": 5}, "El rango de numero_maestros debe ser una lista o un objeto {min, max, step}"),
+    ({"numero_maestros": {"max": 3}}, "El rango de numero_maestros requiere 'min' y 'max'"),
+    ({"numero_maestros": {"min": "a", "max": 3}}, "El rango de numero_maestros debe contener valores numéricos"),
+    ({"numero_maestros": [None]}, "El rango de numero_maestros debe contener valores numéricos"),
+    ({"numero_maestros": []}, "El rango de numero_maestros no contiene valores"),
+    ({"numero_maestros": {"min": 5, "max": 1}}, "Rango inválido para numero_maestros: se requiere min <= max y step > 0"),
+    ({"numero_maestros": {"min": 1, "max": 5, "step": 0}}, "Rango inválido para numero_maestros: se requiere min <= max y step > 0"),
+    ({"numero_maestros": [0, 1]}, "Los valores de alumnos, inscripciones y maestros deben ser mayores a 0"),
+    ({"promedio_calificaciones": {"min": 5, "max": 11}}, "El promedio de calificaciones debe estar entre 0 y 10"),
+])
+def test_scenario_invalid_ranges(ranges, message):
+    parsed, error = parse_scenario_ranges(ranges)
+    assert parsed is None
+    assert error["message"] == message
+
+
+def test_invalid_scenario_does_not_poison_batch(predictor):
+    requests = [
+        {**SCENARIO_BASE, "ranges": {"numero_maestros": [10, 12]}},
+        {**SCENARIO_BASE, "ranges": {"numero_maestros": {"max": 3}}},
+        {**SCENARIO_BASE, "ranges": "not json"},
+    ]
+    responses = process_batch(predictor, 'scenario', requests)
+
+    assert [response["status"] for response in responses] == ["success", "error", "error"]
+    assert responses[0]["prediction_data"]["grid_points"] == 2
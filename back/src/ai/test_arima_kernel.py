@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from arima_kernel import stack_arima_results, forecast_batch, forecast_intervals
+
+ORDERS = [(1, 0, 0), (2, 0, 1), (0, 1, 2), (1, 1, 1), (1, 2, 0), (3, 1, 3)]
+STEPS = 6
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(42)
+    results = []
+    for i, order in enumerate(ORDERS):
+        series = 300 + np.cumsum(rng.normal(1.5, 10, size=40 + i))
+        results.append(ARIMA(series, order=order).fit())
+    return results
+
+
+def test_forecast_batch_matches_get_forecast(fitted):
+    mean, var = forecast_batch(stack_arima_results(fitted), STEPS)
+    lower, upper = forecast_intervals(mean, var)
+
+    for i, result in enumerate(fitted):
+        expected = result.get_forecast(steps=STEPS)
+        conf_int = expected.conf_int()
+        np.testing.assert_allclose(mean[i], expected.predicted_mean, rtol=1e-8, atol=1e-6)
+        np.testing.assert_allclose(var[i], expected.var_pred_mean, rtol=1e-8, atol=1e-6)
+        np.testing.assert_allclose(lower[i], conf_int[:, 0], rtol=1e-8, atol=1e-6)
+        np.testing.assert_allclose(upper[i], conf_int[:, 1], rtol=1e-8, atol=1e-6)
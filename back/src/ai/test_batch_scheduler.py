@@ -0,0 +1,92 @@
+import time
+
+from batch_scheduler import MicroBatchScheduler
+
+
+class RecordingHandler:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self, parameters_list):
+        self.calls.append(list(parameters_list))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("handler failed")
+        return [parameters * 2 for parameters in parameters_list]
+
+
+def run_queued(scheduler, requests):
+    # Encola todo antes de arrancar para que el agrupamiento sea determinista
+    futures = [scheduler.submit(model_type, parameters) for model_type, parameters in requests]
+    scheduler.start()
+    try:
+        return [future.exception(timeout=5) or future.result() for future in futures]
+    finally:
+        scheduler.stop()
+
+
+def test_max_batch_size_cutoff():
+    handler = RecordingHandler()
+    scheduler = MicroBatchScheduler({'a': handler}, max_wait_ms=50, max_batch_size=3)
+    results = run_queued(scheduler, [('a', i) for i in range(7)])
+
+    assert results == [i * 2 for i in range(7)]
+    assert [len(call) for call in handler.calls] == [3, 3, 1]
+    assert scheduler.metrics()['batch_size_distribution'] == {1: 1, 3: 2}
+
+
+def test_window_groups_requests_arriving_together():
+    handler = RecordingHandler()
+    scheduler = MicroBatchScheduler({'a': handler}, max_wait_ms=200, max_batch_size=10).start()
+    try:
+        first = scheduler.submit('a', 1)
+        time.sleep(0.02)
+        second = scheduler.submit('a', 2)
+        assert (first.result(timeout=5), second.result(timeout=5)) == (2, 4)
+    finally:
+        scheduler.stop()
+    assert handler.calls == [[1, 2]]
+
+
+def test_window_expiry_splits_batches():
+    handler = RecordingHandler()
+    scheduler = MicroBatchScheduler({'a': handler}, max_wait_ms=1, max_batch_size=10).start()
+    try:
+        assert scheduler.submit('a', 1).result(timeout=5) == 2
+        assert scheduler.submit('a', 2).result(timeout=5) == 4
+    finally:
+        scheduler.stop()
+    assert handler.calls == [[1], [2]]
+
+
+def test_groups_by_model_type_and_preserves_order():
+    handler_a, handler_b = RecordingHandler(), RecordingHandler()
+    scheduler = MicroBatchScheduler({'a': handler_a, 'b': handler_b}, max_wait_ms=50, max_batch_size=10)
+    results = run_queued(scheduler, [('a', 1), ('b', 10), ('a', 2), ('b', 20), ('a', 3)])
+
+    assert results == [2, 20, 4, 40, 6]
+    assert handler_a.calls == [[1, 2, 3]]
+    assert handler_b.calls == [[10, 20]]
+
+
+def test_failing_group_does_not_affect_other_groups():
+    scheduler = MicroBatchScheduler(
+        {'good': RecordingHandler(), 'bad': RecordingHandler(fail=True)}, max_wait_ms=50, max_batch_size=10)
+    results = run_queued(scheduler, [('good', 1), ('bad', 2), ('unknown', 3), ('good', 4)])
+
+    assert results[0] == 2 and results[3] == 8
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], ValueError)
+
+
+def test_queue_delay_includes_earlier_groups():
+    scheduler = MicroBatchScheduler(
+        {'slow': RecordingHandler(delay=0.1), 'fast': RecordingHandler()}, max_wait_ms=1, max_batch_size=10)
+    run_queued(scheduler, [('slow', 1), ('fast', 2)])
+
+    metrics = scheduler.metrics()
+    assert metrics['requests'] == 2
+    assert metrics['batches'] == 2
+    assert metrics['queue_delay_ms']['max'] >= 100
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup_store import RollupStore, METRICS
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), 'datos_educativos_extended.txt')
+MUNICIPIOS = {escuela_id: escuela_id % 4 + 1 for escuela_id in range(1, 30)}
+
+
+@pytest.fixture(scope='module')
+def data():
+    data = pd.read_csv(DATA_PATH)
+    data['time_period'] = data['anio'] + (data['semestre'] - 1) * 0.5
+    return data
+
+
+def assert_matches_groupby(store, data, level='periodo', key=None):
+    if level == 'escuela':
+        data = data[data['escuelaId'] == key]
+    elif level == 'municipio':
+        data = data[data['escuelaId'].map(MUNICIPIOS) == key]
+    for metric in METRICS:
+        expected = data.groupby('time_period')[metric].mean().sort_index()
+        series = store.mean_series(metric, level, key)
+        np.testing.assert_array_equal(series.index, expected.index)
+        np.testing.assert_allclose(series.values, expected.values, rtol=1e-12)
+
+
+def test_mean_series_matches_groupby(data):
+    store = RollupStore.from_dataframe(data, MUNICIPIOS)
+    assert len(store) == len(data)
+    assert_matches_groupby(store, data)
+    assert_matches_groupby(store, data, 'escuela', 3)
+    assert_matches_groupby(store, data, 'municipio', 2)
+
+
+def test_correction_replaces_previous_values(data):
+    store = RollupStore.from_dataframe(data, MUNICIPIOS)
+    record = data.iloc[10].to_dict()
+    assert not store.add_record(record)
+
+    record['cantidad_alumnos'] = 999
+    assert store.add_record(record)
+    corrected = data.copy()
+    corrected.loc[10, 'cantidad_alumnos'] = 999
+
+    assert len(store) == len(data)
+    assert_matches_groupby(store, corrected)
+    assert_matches_groupby(store, corrected, 'escuela', int(record['escuelaId']))
+    assert_matches_groupby(store, corrected, 'municipio', MUNICIPIOS[int(record['escuelaId'])])
+
+
+def test_remove_record(data):
+    store = RollupStore.from_dataframe(data, MUNICIPIOS)
+    row = data.iloc[0]
+    store.remove_record(row['escuelaId'], row['anio'], row['semestre'])
+
+    assert len(store) == len(data) - 1
+    assert_matches_groupby(store, data.drop(index=0))
+    with pytest.raises(KeyError):
+        store.remove_record(row['escuelaId'], row['anio'], row['semestre'])
+
+
+def test_municipio_fill_in():
+    store = RollupStore({1: 10})
+    base = {'anio': 2020, 'semestre': 1, **{metric: 1.0 for metric in METRICS}}
+    store.add_record({**base, 'escuelaId': 1})
+    store.add_record({**base, 'escuelaId': 2, 'municipioId': 10, 'cantidad_alumnos': 3.0})
+    store.add_record({**base, 'escuelaId': 3, 'cantidad_alumnos': 50.0})
+
+    assert store.mean_series('cantidad_alumnos', 'municipio', 10).tolist() == [2.0]
+    assert store.mean_series('cantidad_alumnos').tolist() == [18.0]
+    assert list(store.rollups['municipio']) == [10]
+
+    store.remove_record(1, 2020, 1)
+    store.remove_record(2, 2020, 1)
+    assert store.rollups['municipio'] == {}
+    assert store.mean_series('cantidad_alumnos', 'municipio', 10).empty
+
+
+def test_save_load_round_trip(data, tmp_path):
+    store = RollupStore.from_dataframe(data, MUNICIPIOS)
+    path = tmp_path / 'rollup_store.npz'
+    store.save(path)
+    loaded = RollupStore.load(path)
+
+    assert loaded.records == store.records
+    assert loaded.rollups == store.rollups
+    assert loaded.escuela_municipios == store.escuela_municipios
+    assert_matches_groupby(loaded, data, 'municipio', 1)
+
+
+def test_sync_dataframe_applies_only_changes(data):
+    store = RollupStore.from_dataframe(data, MUNICIPIOS)
+    assert store.sync_dataframe(data) == (0, 0)
+
+    changed = data.drop(index=[0, 1]).copy()
+    changed.loc[5, 'promedio_calificaciones'] = 9.99
+    assert store.sync_dataframe(changed) == (1, 2)
+    assert_matches_groupby(store, changed)
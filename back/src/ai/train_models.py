@@ -3,12 +3,14 @@ import pandas as pd
 import numpy as np
 import pickle
 import joblib
+import os
 from datetime import datetime
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, accuracy_score
 from statsmodels.tsa.arima.model import ARIMA
+from rollup_store import RollupStore
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -27,7 +29,23 @@ def load_and_preprocess_data():
     
     return data
 
-def train_arima_models(data):
+def build_rollup_store(data, path='models/rollup_store.npz'):
+
+    # Reutiliza los agregados guardados y aplica solo registros nuevos, corregidos o eliminados
+    if os.path.exists(path):
+        store = RollupStore.load(path)
+    else:
+        store = RollupStore()
+    updated, removed = store.sync_dataframe(data)
+
+    if updated or removed or not os.path.exists(path):
+        store.save(path)
+    print(f"Agregados: {updated} registros actualizados, {removed} eliminados, "
+          f"{len(store.rollups['periodo'])} periodos, {len(store)} registros")
+
+    return store
+
+def train_arima_models(store):
    
     
     print("\n" + "="*50)
@@ -35,11 +53,11 @@ def train_arima_models(data):
     print("="*50)
     
 
-    ts_students = data.groupby('time_period')['cantidad_alumnos'].mean().sort_index()
+    ts_students = store.mean_series('cantidad_alumnos')
     print(f"Serie de tiempo para estudiantes: {len(ts_students)} periods")
     
 
-    ts_enrollments = data.groupby('time_period')['numero_inscripciones'].mean().sort_index()
+    ts_enrollments = store.mean_series('numero_inscripciones')
     print(f"Serie de tiempo para inscripciones: {len(ts_enrollments)} periods")
     
    
@@ -215,11 +233,12 @@ def main():
  
     print("\n1. Cargando datos...")
     data = load_and_preprocess_data()
+    store = build_rollup_store(data)
     
     
     print("\n2. Entrenando modelo ARIMA...")
     try:
-        arima_students, arima_enrollments = train_arima_models(data)
+        arima_students, arima_enrollments = train_arima_models(store)
     except Exception as e:
         print(f"Error al entrenar modelo: {e}")
         return
@@ -242,6 +261,7 @@ def main():
     print("  - decision_tree_model.pkl")
     print("  - arima_metadata.pkl")
     print("  - decision_tree_metadata.pkl")
+    print("  - rollup_store.npz")
     print(f"\nEntrenamiento completado en: {datetime.now()}")
     
     print("\nNota final:")